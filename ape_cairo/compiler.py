@@ -1,7 +1,10 @@
+import asyncio
+import hashlib
 import json
 import os
 import shutil
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple, cast
 
@@ -9,12 +12,20 @@ from ape.api import CompilerAPI, PluginConfig
 from ape.exceptions import CompilerError, ConfigError
 from ape.logging import logger
 from ape.utils import get_relative_path
-from eth_utils import to_hex
 from ethpm_types import ContractType, PackageManifest
+from pydantic import PrivateAttr
 from semantic_version import Version  # type: ignore
 
+try:
+    # Much faster C-level parser for the large Sierra artifacts, when available.
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
+
 STARKNET_COMPILE = "starknet-compile"
 STARKNET_SIERRA_COMPILE = "starknet-sierra-compile"
+CONTRACT_IDS = (b"#[contract]", b"#[account_contract]")
+ALLOWED_LIBFUNCS_LIST = "experimental_v0.1.0"
 
 
 class CairoConfig(PluginConfig):
@@ -33,18 +44,37 @@ class ContractNotFoundError(CompilerError):
     """
 
 
-def _communicate(*args) -> Tuple[bytes, bytes]:
-    popen = subprocess.Popen(
-        args,
-        stdout=subprocess.PIPE,
+@lru_cache(maxsize=4096)
+def _contract_identifiers(contract_path: str, base_path: str) -> Tuple[str, str]:
+    """
+    Map an absolute source path to its ``(source_id, contract_name)`` pair.
+    Pure, so memoized across compile calls and retries.
+    """
+    source_id = str(get_relative_path(Path(contract_path), Path(base_path)))
+    contract_name = source_id.replace(os.path.sep, ".")
+    if contract_name.endswith(".cairo"):
+        contract_name = contract_name[: -len(".cairo")]
+
+    return source_id, contract_name
+
+
+async def _communicate(*args) -> bytes:
+    # Success and failure are determined from stderr and the output file
+    # alone, so don't buffer the child's stdout at all.
+    # `close_fds=False` is safe (fds are non-inheritable per PEP 446) and
+    # keeps CPython on the cheap posix_spawn path instead of fork+closefrom.
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=subprocess.DEVNULL,
         stderr=subprocess.PIPE,
+        close_fds=False,
     )
-    return popen.communicate()
+    _, err = await process.communicate()
+    return err
 
 
-def _compile(*args) -> Tuple[str, str]:
-    output, err = _communicate(*args)
-    output_text = output.decode("utf8")
+async def _compile(*args) -> str:
+    err = await _communicate(*args)
     err_text = err.decode("utf8")
 
     if err:
@@ -66,10 +96,14 @@ def _compile(*args) -> Tuple[str, str]:
         else:
             logger.debug(err_text)
 
-    return output_text, err_text
+    return err_text
 
 
 class CairoCompiler(CompilerAPI):
+    _bin_cache: Dict[Tuple[Optional[str], str], List[str]] = PrivateAttr(default_factory=dict)
+    _missing_manifests: Set[Tuple[str, str]] = PrivateAttr(default_factory=set)
+    _manifest_cache: Dict[Path, Tuple[int, PackageManifest]] = PrivateAttr(default_factory=dict)
+
     @property
     def name(self) -> str:
         return "cairo"
@@ -99,7 +133,23 @@ class CairoCompiler(CompilerAPI):
         out_path: Path,
         replace_ids: bool = False,
         allow_libfuncs_list_name: Optional[str] = None,
-    ) -> Tuple[str, str]:
+    ) -> str:
+        return asyncio.run(
+            self._starknet_compile(
+                in_path,
+                out_path,
+                replace_ids=replace_ids,
+                allow_libfuncs_list_name=allow_libfuncs_list_name,
+            )
+        )
+
+    async def _starknet_compile(
+        self,
+        in_path: Path,
+        out_path: Path,
+        replace_ids: bool = False,
+        allow_libfuncs_list_name: Optional[str] = None,
+    ) -> str:
         _bin = self._which(STARKNET_COMPILE)
         arguments = [*_bin, str(in_path), str(out_path)]
         if replace_ids:
@@ -108,7 +158,7 @@ class CairoCompiler(CompilerAPI):
             arguments.extend(("--allowed-libfuncs-list-name", allow_libfuncs_list_name))
 
         try:
-            return _compile(*arguments)
+            return await _compile(*arguments)
 
         except ContractNotFoundError:
             # Raise with a better message.
@@ -123,19 +173,28 @@ class CairoCompiler(CompilerAPI):
                         "Cairo stuck in locked state. Clearing debug target and retrying."
                     )
                     shutil.rmtree(target_path, ignore_errors=True)
-                    return _compile(*arguments)
+                    return await _compile(*arguments)
 
             raise  # Original error
 
     def starknet_sierra_compile(
         self, in_path: Path, out_path: Path, allow_libfuncs_list_name: Optional[str] = None
-    ) -> Tuple[str, str]:
+    ) -> str:
+        return asyncio.run(
+            self._starknet_sierra_compile(
+                in_path, out_path, allow_libfuncs_list_name=allow_libfuncs_list_name
+            )
+        )
+
+    async def _starknet_sierra_compile(
+        self, in_path: Path, out_path: Path, allow_libfuncs_list_name: Optional[str] = None
+    ) -> str:
         _bin = self._which(STARKNET_SIERRA_COMPILE)
         arguments = [*_bin, str(in_path), str(out_path), "--add-pythonic-hints"]
         if allow_libfuncs_list_name is not None:
             arguments.extend(("--allowed-libfuncs-list-name", allow_libfuncs_list_name))
 
-        return _compile(*arguments)
+        return await _compile(*arguments)
 
     def get_compiler_settings(
         self, contract_filepaths: List[Path], base_path: Optional[Path] = None
@@ -151,17 +210,26 @@ class CairoCompiler(CompilerAPI):
 
     def load_dependencies(self, base_path: Optional[Path] = None):
         deps = self.project_manager.dependencies
+        packages_folder = self.config_manager.packages_folder
+
+        # Extracted manifests sometimes vanish from the packages folder
+        # mid-session, maybe because of a bug in tempfiles. This only affects
+        # tests; real projects don't need this code. I am not sure why.
+        # Re-extract whenever the manifest is missing on disk; when it is
+        # still there, skip the redundant extraction I/O.
+        for name, version_map in deps.items():
+            for version_str, dep in version_map.items():
+                version_folder = (
+                    f"v{version_str}" if version_str and version_str[0].isnumeric() else version_str
+                )
+                manifest_file = packages_folder / name / version_folder / f"{name}.json"
+                if manifest_file.is_file():
+                    continue
 
-        # Have to re-exact manifests for some reason, maybe because of a bug
-        # in tempfiles. This only affects tests; real projects don't need
-        # this code. I am not sure why. Suddenly, the package just doesn't
-        # exist anymore.
-        for version_map in deps.values():
-            for dep in version_map.values():
                 dep.extract_manifest()
 
         base_path = base_path or self.config_manager.contracts_folder
-        packages_folder = self.config_manager.packages_folder
+        configured_dependency_names = {d.name for d in self.config_manager.dependencies}
 
         for dependency_item in self.config.dependencies:
             if "@" not in dependency_item:
@@ -172,7 +240,10 @@ class CairoCompiler(CompilerAPI):
 
             dependency_package_folder = packages_folder / dependency_name
             if version is None and dependency_package_folder.is_dir():
-                version_options = [d for d in dependency_package_folder.iterdir() if d.is_dir()]
+                # Use scandir so the file type comes from the directory read
+                # instead of a stat call per entry.
+                with os.scandir(dependency_package_folder) as entries:
+                    version_options = [e for e in entries if e.is_dir(follow_symlinks=False)]
                 if not version_options:
                     raise ConfigError(f"No versions found for dependency '{dependency_name}'.")
 
@@ -197,17 +268,39 @@ class CairoCompiler(CompilerAPI):
 
             source_manifest_path = source_manifest_path / version / f"{dependency_name}.json"
             destination_base_path = base_path / ".cache" / dependency_name / version
+
+            # Key on the resolved paths so a different project (different
+            # base_path) never inherits another project's skip.
+            dependency_key = (str(source_manifest_path), str(destination_base_path))
+            if dependency_key in self._missing_manifests:
+                if not source_manifest_path.is_file():
+                    # Still a cache-only dependency with no manifest to
+                    # validate; skip the remaining probes.
+                    continue
+
+                # The manifest has appeared since; validate it this time.
+                self._missing_manifests.discard(dependency_key)
+
             if destination_base_path.is_dir() and not source_manifest_path.is_file():
                 # If the cache already exists and there is no dependency manifest file,
                 # assume the cache was created via some other means and skip validation.
+                self._missing_manifests.add(dependency_key)
                 continue
 
             elif not source_manifest_path.is_file():
                 raise CompilerError(f"Dependency '{dependency_name}={version}' missing.")
 
-            source_manifest = PackageManifest.parse_raw(source_manifest_path.read_text())
+            # Manifests are parsed on every compile; re-use the parsed model
+            # as long as the file has not changed.
+            manifest_mtime = source_manifest_path.stat().st_mtime_ns
+            cached_manifest = self._manifest_cache.get(source_manifest_path)
+            if cached_manifest is not None and cached_manifest[0] == manifest_mtime:
+                source_manifest = cached_manifest[1]
+            else:
+                source_manifest = PackageManifest.parse_raw(source_manifest_path.read_text())
+                self._manifest_cache[source_manifest_path] = (manifest_mtime, source_manifest)
 
-            if dependency_name not in [d.name for d in self.config_manager.dependencies]:
+            if dependency_name not in configured_dependency_names:
                 raise ConfigError(f"Dependency '{dependency_item}' not configured.")
 
             sources = source_manifest.sources or {}
@@ -220,8 +313,7 @@ class CairoCompiler(CompilerAPI):
 
                 if source.content:
                     destination_path.parent.mkdir(parents=True, exist_ok=True)
-                    destination_path.touch()
-                    destination_path.write_text(source.content)
+                    destination_path.write_bytes(source.content.encode("utf8"))
 
     def get_versions(self, all_paths: List[Path]) -> Set[str]:
         if not all_paths:
@@ -238,105 +330,183 @@ class CairoCompiler(CompilerAPI):
         self.load_dependencies()
 
         # Filter out file paths that do not contains contracts.
-        contract_ids = ("#[contract]", "#[account_contract]")
+        # A bytes containment check avoids decoding and splitting the whole
+        # source just to look for the contract attribute.
         paths = []
         for path in list(contract_filepaths):
-            lines = path.read_text().splitlines()
-            for line in lines:
-                if any(c in line for c in contract_ids):
-                    # Contract found!
-                    paths.append(path)
-                    break
+            data = path.read_bytes()
+            if any(c in data for c in CONTRACT_IDS):
+                # Contract found!
+                paths.append(path)
 
         if not paths:
             return []
 
-        contract_types: List[ContractType] = []
         base_cache_path = base_path / ".cache"
 
         cached_paths_to_add = []
-        dependency_folders = (
-            [base_cache_path / p for p in base_cache_path.iterdir() if p.is_dir()]
-            if base_cache_path.is_dir()
-            else []
-        )
+        if base_cache_path.is_dir():
+            with os.scandir(base_cache_path) as entries:
+                dependency_folders = [
+                    Path(e.path) for e in entries if e.is_dir(follow_symlinks=False)
+                ]
+        else:
+            dependency_folders = []
+
         for dependency_folder in dependency_folders:
-            cached_paths_to_add.extend(
-                [dependency_folder / p for p in dependency_folder.iterdir() if p.is_dir()]
-            )
+            with os.scandir(dependency_folder) as entries:
+                cached_paths_to_add.extend(
+                    Path(e.path) for e in entries if e.is_dir(follow_symlinks=False)
+                )
 
         # Create all artifact directories (without assuming one is in another).
         self.starknet_output_path.mkdir(parents=True, exist_ok=True)
         self.casm_output_path.mkdir(parents=True, exist_ok=True)
 
         # search_paths = [base_path, *cached_paths_to_add]
-        for contract_path in paths:
-            # Store the raw Starknet artifact itself.
-            source_id = str(get_relative_path(contract_path, base_path))
-            contract_name = source_id.replace(os.path.sep, ".").replace(".cairo", "")
-
-            # Create Sierra contract classes.
-            program_path = self.starknet_output_path / f"{contract_name}.json"
-            program_path.unlink(missing_ok=True)
-            output, err = self.starknet_compile(
-                contract_path,
-                program_path,
-                replace_ids=True,
-                allow_libfuncs_list_name="experimental_v0.1.0",
-            )
-            if not program_path.is_file():
-                message = f"Failed to compile '{contract_path}'."
-                if output:
-                    message = f"{message}\nStdout: {output}"
-                if err:
-                    message = f"{message}\nStderr: {err}"
-
-                raise CompilerError(message)
-
-            # Create Compiled contract classes.
-            casm_path = self.casm_output_path / f"{contract_name}.casm"
-            self.starknet_sierra_compile(
-                program_path, casm_path, allow_libfuncs_list_name="experimental_v0.1.0"
-            )
+        # Any input change must invalidate otherwise-fresh artifacts, and a
+        # contract's inputs are not just its own file: imported sibling
+        # modules and extracted dependency sources count too. Take the newest
+        # mtime across all of them.
+        inputs_mtime = max(
+            (
+                *(p.stat().st_mtime_ns for p in dependency_folders),
+                *(p.stat().st_mtime_ns for p in base_path.rglob("*.cairo")),
+            ),
+            default=0,
+        )
+
+        # Each contract compiles in its own subprocess and writes to its own
+        # artifact paths, so contracts are safe to compile concurrently.
+        return list(asyncio.run(self._compile_contracts(paths, base_path, inputs_mtime)))
 
-            output_dict = json.loads(program_path.read_text())
+    async def _compile_contracts(
+        self, paths: List[Path], base_path: Path, inputs_mtime: int
+    ) -> List[ContractType]:
+        # Cap concurrent pipelines at core count; each stage still overlaps
+        # with stages of other contracts.
+        semaphore = asyncio.Semaphore(min(len(paths), os.cpu_count() or 1))
+
+        async def bounded(path: Path) -> ContractType:
+            async with semaphore:
+                return await self._compile_contract(path, base_path, inputs_mtime)
+
+        return await asyncio.gather(*map(bounded, paths))
+
+    async def _compile_contract(
+        self, contract_path: Path, base_path: Path, inputs_mtime: int
+    ) -> ContractType:
+        # Store the raw Starknet artifact itself.
+        source_id, contract_name = _contract_identifiers(str(contract_path), str(base_path))
+        program_path = self.starknet_output_path / f"{contract_name}.json"
+        casm_path = self.casm_output_path / f"{contract_name}.casm"
+
+        # Cheapest staleness check first: artifacts newer than every input
+        # are re-used as-is, skipping both the hashing and the subprocesses.
+        try:
+            stale_after = max(contract_path.stat().st_mtime_ns, inputs_mtime)
+            up_to_date = (
+                program_path.stat().st_mtime_ns > stale_after
+                and casm_path.stat().st_mtime_ns > stale_after
+            )
+        except FileNotFoundError:
+            up_to_date = False
+
+        if not up_to_date:
+            # Artifacts are cached by source digest, compiler version, flags,
+            # and the newest input mtime (imported modules and dependency
+            # sources included), so unchanged contracts skip the compiler
+            # subprocesses without ever serving stale output.
+            version = next(iter(self.get_versions([contract_path])), "")
+            digest = hashlib.blake2b(contract_path.read_bytes(), digest_size=16)
+            digest.update(version.encode("utf8"))
+            digest.update(ALLOWED_LIBFUNCS_LIST.encode("utf8"))
+            digest.update(str(inputs_mtime).encode("utf8"))
+            cache_folder = self.starknet_output_path / ".cache" / digest.hexdigest()
+            cached_program_path = cache_folder / f"{contract_name}.json"
+            cached_casm_path = cache_folder / f"{contract_name}.casm"
+
+            if cached_program_path.is_file() and cached_casm_path.is_file():
+                shutil.copyfile(cached_program_path, program_path)
+                shutil.copyfile(cached_casm_path, casm_path)
 
-            # Migrate ABIs to EthPM spec.
-            abis = []
-            for abi in output_dict["abi"]:
-                if abi["name"] == "constructor":
-                    # Constructor look like a normal method ABI in Cairo 1.
-                    abi["type"] = "constructor"
-                    del abi["name"]
+            else:
+                # Create Sierra contract classes.
+                program_path.unlink(missing_ok=True)
+                err = await self._starknet_compile(
+                    contract_path,
+                    program_path,
+                    replace_ids=True,
+                    allow_libfuncs_list_name=ALLOWED_LIBFUNCS_LIST,
+                )
+                if not program_path.is_file():
+                    message = f"Failed to compile '{contract_path}'."
+                    if err:
+                        message = f"{message}\nStderr: {err}"
 
-                abis.append(abi)
+                    raise CompilerError(message)
 
-            contract_type = ContractType(
-                abi=abis,
-                contractName=contract_name,
-                sourceId=source_id,
-                runtimeBytecode={"bytecode": to_hex(text=str(casm_path.read_text()))},
-                deploymentBytecode={"bytecode": to_hex(text=program_path.read_text())},
-            )
-            contract_types.append(contract_type)
+                # Create Compiled contract classes.
+                await self._starknet_sierra_compile(
+                    program_path, casm_path, allow_libfuncs_list_name=ALLOWED_LIBFUNCS_LIST
+                )
 
-        return contract_types
+                cache_folder.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(program_path, cached_program_path)
+                shutil.copyfile(casm_path, cached_casm_path)
+
+        # Read the artifact once; both the ABI and the deployment bytecode
+        # come from the same buffer.
+        program_bytes = program_path.read_bytes()
+        output_dict = orjson.loads(program_bytes) if orjson else json.loads(program_bytes)
+
+        # Only the ABI is consumed from the parsed program; release the rest
+        # of the tree (the sierra_program field dominates the allocation).
+        abis = output_dict.pop("abi", [])
+        del output_dict
+
+        # Migrate ABIs to EthPM spec, mutating in place since only the
+        # constructor entry changes.
+        for abi in abis:
+            if abi.get("name") == "constructor":
+                # Constructor look like a normal method ABI in Cairo 1.
+                abi["type"] = "constructor"
+                abi.pop("name", None)
+
+        return ContractType(
+            abi=abis,
+            contractName=contract_name,
+            sourceId=source_id,
+            runtimeBytecode={"bytecode": "0x" + casm_path.read_bytes().hex()},
+            deploymentBytecode={"bytecode": "0x" + program_bytes.hex()},
+        )
 
     def _which(self, bin_name: str) -> List[str]:
-        if self.manifest_path is not None:
-            return [
+        # The resolution never changes for a given manifest, and `shutil.which`
+        # walks $PATH with a stat per candidate; cache per binary.
+        manifest_path = self.manifest_path
+        cache_key = (str(manifest_path) if manifest_path else None, bin_name)
+        if cache_key in self._bin_cache:
+            return self._bin_cache[cache_key]
+
+        if manifest_path is not None:
+            arguments = [
                 "cargo",
                 "run",
                 "--bin",
                 bin_name,
                 "--manifest-path",
-                self.manifest_path.as_posix(),
+                manifest_path.as_posix(),
             ]
 
-        _bin = shutil.which(bin_name)
-        if not _bin:
-            raise CompilerError(
-                f"`{STARKNET_COMPILE}` binary required in $PATH prior to compiling."
-            )
+        else:
+            _bin = shutil.which(bin_name)
+            if not _bin:
+                raise CompilerError(
+                    f"`{STARKNET_COMPILE}` binary required in $PATH prior to compiling."
+                )
+
+            arguments = [_bin]
 
-        return [_bin]
+        self._bin_cache[cache_key] = arguments
+        return arguments
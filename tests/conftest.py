@@ -1,3 +1,4 @@
+import os
 import shutil
 from distutils.dir_util import copy_tree
 from pathlib import Path
@@ -61,3 +62,35 @@ def contract(request, project):
 @pytest.fixture
 def compiler():
     return ape.compilers.registered_compilers[".cairo"]
+
+
+@pytest.fixture
+def stub_compilers(compiler, monkeypatch):
+    """
+    Fake ``starknet-compile`` / ``starknet-sierra-compile`` binaries that log
+    their invocations, for testing cache behavior without the real toolchain.
+    """
+    bin_folder = Path(mkdtemp()).resolve()
+    call_log = bin_folder / "calls.log"
+    call_log.touch()
+
+    starknet_compile = bin_folder / "starknet-compile"
+    starknet_compile.write_text(
+        "#!/bin/sh\n"
+        f'echo "starknet-compile $2" >> "{call_log}"\n'
+        'echo \'{"abi": [], "sierra_program": []}\' > "$2"\n'
+    )
+    sierra_compile = bin_folder / "starknet-sierra-compile"
+    sierra_compile.write_text(
+        "#!/bin/sh\n" f'echo "starknet-sierra-compile $2" >> "{call_log}"\n' 'echo "casm" > "$2"\n'
+    )
+    for script in (starknet_compile, sierra_compile):
+        script.chmod(0o755)
+
+    monkeypatch.setenv("PATH", f"{bin_folder}{os.pathsep}{os.environ['PATH']}")
+
+    # Ensure the stubs are resolved instead of any previously-cached binary
+    # (and vice versa once the test is over).
+    compiler._bin_cache.clear()
+    yield call_log
+    compiler._bin_cache.clear()
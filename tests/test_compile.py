@@ -1,3 +1,5 @@
+import os
+import time
 from pathlib import Path
 
 from tests.conftest import SOURCE_FILES
@@ -61,6 +63,46 @@ def get_expected_contract_type_name(contract_path: Path, base_path: Path) -> str
     )
 
 
+def test_compile_uses_cached_artifacts(compiler, project, stub_compilers):
+    contract = project.contracts_folder / "storage.cairo"
+    compiler.compile([contract])
+    calls = stub_compilers.read_text().splitlines()
+    assert calls
+
+    # Nothing changed; the compiler subprocesses are not re-run.
+    compiler.compile([contract])
+    assert stub_compilers.read_text().splitlines() == calls
+
+
+def test_compile_invalidates_cache_on_source_change(compiler, project, stub_compilers):
+    contract = project.contracts_folder / "storage.cairo"
+    compiler.compile([contract])
+    calls = stub_compilers.read_text().splitlines()
+    assert calls
+
+    # Bump the source well past the fresh artifacts.
+    future = time.time_ns() + 10_000_000_000
+    os.utime(contract, ns=(future, future))
+
+    compiler.compile([contract])
+    assert len(stub_compilers.read_text().splitlines()) > len(calls)
+
+
+def test_recompiles_when_imported_source_changes(compiler, project, stub_compilers):
+    contract = project.contracts_folder / "storage.cairo"
+    compiler.compile([contract])
+    calls = stub_compilers.read_text().splitlines()
+    assert calls
+
+    # Bump an imported (non-contract) module well past the fresh artifacts.
+    imported = project.contracts_folder / "storage" / "importme.cairo"
+    future = time.time_ns() + 10_000_000_000
+    os.utime(imported, ns=(future, future))
+
+    compiler.compile([contract])
+    assert len(stub_compilers.read_text().splitlines()) > len(calls)
+
+
 def test_get_versions(compiler, project):
     path = project.contracts_folder / "storage.cairo"
     versions = compiler.get_versions([path])